@@ -1,29 +1,138 @@
 import asyncio
+import atexit
 import json
 import os
+import queue
+import random
 import re
 import logging
+import signal
 import ssl # Import ssl module
+import tempfile
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
-from typing import Dict, List, Optional
-from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from dataclasses import dataclass, fields
+from functools import lru_cache, partial
 
 import aiohttp
+import orjson
 from aiohttp import web
+
+try:
+    import uvloop # libuv-based event loop; optional and not available on Windows
+except ImportError:
+    uvloop = None
 # Removed requests as aiohttp.ClientSession is used consistently
 
 # Configure logging
+# Records go through a queue so file/console I/O happens on the listener thread,
+# not on the event loop that serves webhooks
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    RotatingFileHandler('bot.log', maxBytes=10_000_000, backupCount=3, encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+_log_queue = queue.SimpleQueue()
+_queue_handler = QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter('%(message)s')) # Full format is applied by the listener's handlers
+log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[_queue_handler]
 )
+log_listener.start()
+atexit.register(log_listener.stop) # Drain queued records on interpreter exit
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Sentence replacements are matched as unanchored literals; very short keys would match
+# almost everywhere, so anything below this length belongs in word replacements instead
+MIN_SENTENCE_LENGTH = 2
+
+# Outbound Bot API limits: concurrent requests in flight (default for the max_api_concurrency
+# config option), and attempts for 429/5xx responses. A 429 asking to wait longer than
+# API_MAX_RETRY_AFTER seconds fails right away rather than stalling the chat's worker
+API_MAX_CONCURRENCY = 50
+API_MAX_ATTEMPTS = 3
+API_MAX_RETRY_AFTER = 30
+
+# Client-side send rate limits (messages per second, burst size), kept under Telegram's
+# ~30 msg/s per bot and ~1 msg/s per chat so sends are paced instead of hitting 429s
+API_GLOBAL_RATE = 25
+API_GLOBAL_BURST = 30
+API_CHAT_RATE = 1
+API_CHAT_BURST = 3
+
+# Webhook updates are acknowledged right away and processed in the background by one
+# worker per chat; at most this many workers process an update at the same time
+UPDATE_MAX_CONCURRENCY = 100
+
+# Updates are processed in order per chat by a worker that exits after this many idle seconds.
+# Each chat queues at most CHAT_QUEUE_SIZE updates; only that chat's acks wait when it's full
+CHAT_WORKER_IDLE_TIMEOUT = 60.0
+CHAT_QUEUE_SIZE = 256
+
+# Posts of one album arrive as separate updates; wait this long (seconds) after the
+# latest part before forwarding the whole album in a single request
+MEDIA_GROUP_WINDOW = 0.2
+
+# Config writes wait until edits have been quiet for CONFIG_SAVE_DELAY seconds,
+# but never hold unsaved changes longer than CONFIG_SAVE_MAX_DELAY
+CONFIG_SAVE_DELAY = 0.5
+CONFIG_SAVE_MAX_DELAY = 5.0
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+
+# Listen backlog for the TCP webhook server, sized for bursts of parallel Telegram deliveries
+SERVER_BACKLOG = 4096
+
+# Only ask Telegram for the update types process_update actually handles
+WEBHOOK_ALLOWED_UPDATES = ["message", "channel_post", "callback_query"]
+
+class AsyncTokenBucket:
+    """Token bucket rate limiter: refills `rate` tokens per second, holds at most `burst`."""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock() # Waiters are served in arrival order
+    
+    async def acquire(self):
+        """Wait until a token is available and take it."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+def json_response(data, **kwargs) -> web.Response:
+    """web.json_response counterpart that encodes with orjson straight to bytes."""
+    return web.Response(body=orjson.dumps(data), content_type='application/json', **kwargs)
+
+@lru_cache(maxsize=8)
+def _build_ssl_context(cert_file: str, key_file: str) -> ssl.SSLContext:
+    """Server SSL context for a cert/key pair, built once and reused on later startups."""
+    # Plain server context: clients aren't asked for certificates, so unlike
+    # create_default_context(Purpose.CLIENT_AUTH) there is no CA trust store to load
+    ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    ssl_context.load_cert_chain(cert_file, key_file)
+    return ssl_context
+
+@lru_cache(maxsize=1)
+def _client_ssl_context() -> ssl.SSLContext:
+    """Client SSL context for Bot API calls; loading the CA store is done once per process."""
+    return ssl.create_default_context()
+
+@dataclass(slots=True)
 class BotConfig:
     bot_token: str
     webhook_url: str = ""
@@ -33,6 +142,21 @@ class BotConfig:
     target_channel: str = ""
     replacements: Dict = None
     forwarding_enabled: bool = False
+    max_connections: int = 100 # Parallel webhook deliveries Telegram may open (1-100)
+    # Keep posts that arrive while the bot restarts; Telegram redelivers them once the webhook is back
+    drop_pending_updates: bool = False
+    # Leave the webhook registered on shutdown when the process is about to be replaced, so
+    # Telegram just queues updates until the new process answers
+    delete_webhook_on_shutdown: bool = True
+    # Bot API requests in flight at once (the pooled connections to the API host follow it)
+    max_api_concurrency: int = API_MAX_CONCURRENCY
+    # Point at a self-hosted telegram-bot-api server to cut round trips (it also lifts the
+    # 20/50 MB file limits and the max_connections cap of 100)
+    api_base_url: str = TELEGRAM_API_URL
+    # Serve plain HTTP on this UNIX socket and leave TLS to a reverse proxy (nginx, Caddy)
+    unix_socket_path: str = ""
+    # Bind the TCP port with SO_REUSEPORT so a replacement process can start before the old one exits
+    reuse_port: bool = False
     
     def __post_init__(self):
         if self.admin_users is None:
@@ -47,9 +171,76 @@ class BotConfig:
             }
 
 class TelegramForwarderBot:
+    _JSON_HEADERS = {"Content-Type": "application/json"}
+
+    # Static menu keyboards as JSON bytes, serialized once so send_message can splice them in verbatim
+    _KB_ADMIN = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "➕ Add Admin", "callback_data": "add_admin_help"}, 
+             {"text": "➖ Remove Admin", "callback_data": "remove_admin_help"}],
+            [{"text": "📋 List Admins", "callback_data": "list_admins"}]
+        ]
+    })
+    _KB_CHANNELS = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "➕ Add Channel", "callback_data": "add_channel_help"}, 
+             {"text": "➖ Remove Channel", "callback_data": "remove_channel_help"}],
+            [{"text": "📋 List Channels", "callback_data": "list_channels"}]
+        ]
+    })
+    _KB_TARGET = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "🗑️ Clear Target", "callback_data": "clear_target_confirm"}]
+        ]
+    })
+    _KB_REPLACEMENTS = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "🔗 Links", "callback_data": "manage_links"}, 
+             {"text": "📝 Words", "callback_data": "manage_words"}],
+            [{"text": "📄 Sentences", "callback_data": "manage_sentences"}],
+            [{"text": "📋 View All", "callback_data": "view_replacements"},
+             {"text": "🗑️ Clear All", "callback_data": "clear_all_replacements"}]
+        ]
+    })
+    _KB_MANAGE_LINKS = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "➕ Add Link", "callback_data": "add_link_help"}, 
+             {"text": "➖ Remove Link", "callback_data": "remove_link_help"}],
+            [{"text": "🗑️ Clear All Links", "callback_data": "clear_links"}],
+            [{"text": "📋 List Links", "callback_data": "list_links"}]
+        ]
+    })
+    _KB_MANAGE_WORDS = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "➕ Add Word", "callback_data": "add_word_help"}, 
+             {"text": "➖ Remove Word", "callback_data": "remove_word_help"}],
+            [{"text": "🗑️ Clear All Words", "callback_data": "clear_words"}],
+            [{"text": "📋 List Words", "callback_data": "list_words"}]
+        ]
+    })
+    _KB_MANAGE_SENTENCES = orjson.dumps({
+        "inline_keyboard": [
+            [{"text": "➕ Add Sentence", "callback_data": "add_sentence_help"}, 
+             {"text": "➖ Remove Sentence", "callback_data": "remove_sentence_help"}],
+            [{"text": "🗑️ Clear All Sentences", "callback_data": "clear_sentences"}],
+            [{"text": "📋 List Sentences", "callback_data": "list_sentences"}]
+        ]
+    })
+
+    # Usage replies shared by the command handlers and their help buttons
+    _USAGE_ADD_LINK = "Usage: <code>/add_link old_link|new_link</code>"
+    _USAGE_ADD_WORD = "Usage: <code>/add_word old_word|new_word</code>"
+    _USAGE_ADD_SENTENCE = "Usage: <code>/add_sentence old_sentence|new_sentence</code>"
+    _USAGE_CLEAR_REPLACEMENTS = """
+Usage:
+<code>/clear_replacements all</code> - Clear all replacements
+<code>/clear_replacements links</code> - Clear link replacements
+<code>/clear_replacements words</code> - Clear word replacements  
+<code>/clear_replacements sentences</code> - Clear sentence replacements
+            """
+    
     def __init__(self, bot_token: str, webhook_url: str = "", webhook_port: int = 8443):
         self.bot_token = bot_token
-        self.base_url = f"https://api.telegram.org/bot{bot_token}"
         
         self.config_file = "bot_config.json"
         self.config = self.load_config()
@@ -57,132 +248,364 @@ class TelegramForwarderBot:
         self.config.bot_token = bot_token
         self.config.webhook_url = webhook_url
         self.config.webhook_port = webhook_port
+        self.base_url = f"{self.config.api_base_url.rstrip('/')}/bot{bot_token}"
+        
+        # Compiled/sorted replacement tables, rebuilt whenever replacements change
+        self._link_pattern: Optional[re.Pattern] = None
+        self._link_lookup: Dict[str, str] = {}
+        self._word_pattern: Optional[re.Pattern] = None
+        self._word_lookup: Dict[str, str] = {}
+        self._sentence_pattern: Optional[re.Pattern] = None
+        self._sentence_lookup: Dict[str, str] = {}
+        # (pattern.subn, replacement callback) per active table, in the order they are applied
+        self._replacement_passes: List[Tuple[Callable, Callable]] = []
+        self._has_replacements = False
+        self._replacements_total = 0 # Kept in step with the tables by _rebuild_replacement_cache
+        # Rendered list/view messages for the inline buttons, dropped when the underlying data changes
+        self._rendered_lists: Dict[str, str] = {}
+        self._rebuild_replacement_cache()
+        
+        # Hashed mirrors of the admin and source channel lists for O(1) membership checks
+        self._admin_set = set(self.config.admin_users)
+        # Chat that ran /start while no admins exist, expected to reply with the first admin's ID
+        self._expecting_first_admin_id: Optional[str] = None
+        self._channel_index: Dict[str, str] = {} # normalized id -> entry as stored in source_channels
+        self._rebuild_source_index()
+        
+        # Debounced config persistence: save_config marks the config dirty and the
+        # background writer coalesces bursts of edits into a single disk write
+        self._config_dirty = asyncio.Event()
+        self._config_pending = False # Changes not yet picked up by the writer
+        self._config_writer_task: Optional[asyncio.Task] = None
+        self._config_write: Optional[asyncio.Future] = None # Disk write currently running in a worker thread
+        
+        # Shared HTTP session for Telegram API calls, created lazily on first use
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._request_semaphore = asyncio.Semaphore(max(self.config.max_api_concurrency, 1))
+        self._global_bucket = AsyncTokenBucket(API_GLOBAL_RATE, API_GLOBAL_BURST)
+        self._chat_buckets: Dict[str, AsyncTokenBucket] = {} # Created lazily per destination chat
+        
+        # Album posts buffered per (chat_id, media_group_id) until the group is complete
+        self._media_groups: Dict[Tuple[str, str], List[Dict]] = {}
+        self._album_flushes: Dict[str, asyncio.Task] = {} # chat_id -> flush of its latest album
+        self._background_tasks: set = set()
+        self._update_semaphore = asyncio.Semaphore(UPDATE_MAX_CONCURRENCY)
+        # Per-chat FIFO of pending updates and the worker draining it
+        self._chat_queues: Dict[str, asyncio.Queue] = {}
+        self._chat_workers: Dict[str, asyncio.Task] = {}
+        self._draining = False # Set on shutdown: workers stop once their queue is empty
         
         self.app = web.Application()
+        # Lifecycle hooks run through the app's signals only (once per runner setup/cleanup)
+        self.app.on_startup.append(self.on_startup)
+        self.app.on_shutdown.append(self.on_shutdown)
+        self.app.on_cleanup.append(self.on_cleanup)
+        self._started = False
+        self._runner: Optional[web.AppRunner] = None
         self.setup_routes()
+        self.setup_commands()
         
     def load_config(self) -> BotConfig:
         """Load configuration from file, handling missing fields gracefully."""
         if os.path.exists(self.config_file):
             try:
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Create BotConfig from loaded data, providing defaults for potentially missing keys
-                    return BotConfig(
-                        bot_token=data.get('bot_token', ""),
-                        webhook_url=data.get('webhook_url', ""),
-                        webhook_port=data.get('webhook_port', 8443),
-                        admin_users=data.get('admin_users', []),
-                        source_channels=data.get('source_channels', []),
-                        target_channel=data.get('target_channel', ""),
-                        replacements=data.get('replacements', {"links": {}, "words": {}, "sentences": {}}),
-                        forwarding_enabled=data.get('forwarding_enabled', False)
-                    )
+                with open(self.config_file, 'rb') as f:
+                    data = orjson.loads(f.read())
+                    # Create BotConfig from the known keys; missing ones fall back to the field defaults
+                    known = {field.name for field in fields(BotConfig)}
+                    return BotConfig(**{"bot_token": "", **{key: value for key, value in data.items() if key in known}})
             except json.JSONDecodeError as e:
-                logger.error(f"Error decoding JSON from config file '{self.config_file}': {e}. Creating default config.")
+                logger.error("Error decoding JSON from config file '%s': %s. Creating default config.", self.config_file, e)
             except IOError as e:
-                logger.error(f"Error reading config file '{self.config_file}': {e}. Creating default config.")
+                logger.error("Error reading config file '%s': %s. Creating default config.", self.config_file, e)
             except Exception as e:
-                logger.error(f"An unexpected error occurred loading config: {e}. Creating default config.")
+                logger.error("An unexpected error occurred loading config: %s. Creating default config.", e)
         
         logger.info("No existing config file or error loading it. Creating a new default configuration.")
         return BotConfig(bot_token="") # Return a default config if loading fails or file doesn't exist
     
     def save_config(self):
-        """Save configuration to file."""
+        """Schedule the configuration to be saved (written immediately if the background writer isn't running)."""
+        if self._config_writer_task is not None and not self._config_writer_task.done():
+            self._config_pending = True
+            self._config_dirty.set()
+        else:
+            self._write_config_sync(self._serialize_config())
+    
+    def _serialize_config(self) -> bytes:
+        """Encode the config (orjson handles the dataclass natively); the bytes can be written off the event loop."""
+        return orjson.dumps(self.config, option=orjson.OPT_INDENT_2)
+    
+    def _write_config_sync(self, data: bytes):
+        """Write serialized config to file atomically (temp file + os.replace)."""
+        tmp_file = None
         try:
-            config_dict = {
-                'bot_token': self.config.bot_token,
-                'webhook_url': self.config.webhook_url,
-                'webhook_port': self.config.webhook_port,
-                'admin_users': self.config.admin_users,
-                'source_channels': self.config.source_channels,
-                'target_channel': self.config.target_channel,
-                'replacements': self.config.replacements,
-                'forwarding_enabled': self.config.forwarding_enabled
-            }
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config_dict, f, indent=2, ensure_ascii=False)
+            # Unique temp file in the same directory so the rename stays atomic
+            # and two writes never share a temp file
+            fd, tmp_file = tempfile.mkstemp(
+                dir=os.path.dirname(self.config_file) or '.', prefix='.cfg', suffix='.tmp'
+            )
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_file, self.config_file)
+            tmp_file = None
             logger.info("Configuration saved successfully.")
         except IOError as e:
-            logger.error(f"Error writing config file '{self.config_file}': {e}")
+            logger.error("Error writing config file '%s': %s", self.config_file, e)
         except Exception as e:
-            logger.error(f"An unexpected error occurred saving config: {e}")
+            logger.error("An unexpected error occurred saving config: %s", e)
+        finally:
+            if tmp_file is not None:
+                try:
+                    os.remove(tmp_file)
+                except OSError:
+                    pass
+    
+    async def _config_writer(self):
+        """Background task that flushes the config to disk once edits settle."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._config_dirty.wait()
+            deadline = loop.time() + CONFIG_SAVE_MAX_DELAY
+            # Re-arm the debounce window while admin edits keep arriving
+            while True:
+                self._config_dirty.clear()
+                await asyncio.sleep(CONFIG_SAVE_DELAY)
+                if not self._config_dirty.is_set() or loop.time() >= deadline:
+                    break
+            self._config_dirty.clear()
+            self._config_pending = False
+            # Shielded so cancelling the writer can't leave an orphaned write racing the final flush
+            self._config_write = asyncio.ensure_future(asyncio.to_thread(self._write_config_sync, self._serialize_config()))
+            await asyncio.shield(self._config_write)
+    
+    async def _stop_config_writer(self):
+        """Stop the background writer and flush any pending changes."""
+        task = self._config_writer_task
+        self._config_writer_task = None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        # Let an in-flight write land first so an older snapshot can't replace the final one
+        write, self._config_write = self._config_write, None
+        if write is not None:
+            await write
+        self._config_dirty.clear()
+        # Skip the final write when every change already went out with the last flush
+        if self._config_pending:
+            self._config_pending = False
+            await asyncio.to_thread(self._write_config_sync, self._serialize_config())
     
     def is_admin(self, user_id: int) -> bool:
         """Check if user is admin"""
-        return user_id in self.config.admin_users
+        return user_id in self._admin_set
     
-    def apply_replacements(self, text: str) -> str:
-        """Apply all text replacements"""
-        if not text:
-            return text
+    @staticmethod
+    def _parse_user_id(value: str) -> Optional[int]:
+        """Parse a Telegram user ID; returns None instead of raising for non-numeric input."""
+        value = value.strip()
+        digits = value[1:] if value.startswith('-') else value
+        if not (digits.isascii() and digits.isdigit()):
+            return None
+        return int(value)
+
+    @staticmethod
+    def _command_arg(text: str) -> str:
+        """Everything after the command word, split on any whitespace like the command itself."""
+        parts = text.split(None, 1)
+        return parts[1].strip() if len(parts) > 1 else ""
+
+    @staticmethod
+    def _channel_key(channel: str) -> str:
+        """Normalized form used to compare channels ('@'-stripped, lower-cased)."""
+        return channel.lstrip('@').lower()
+
+    def _rebuild_source_index(self):
+        """Rebuild the normalized source channel index."""
+        self._channel_index = {self._channel_key(source): source for source in self.config.source_channels}
+    
+    def _rebuild_replacement_cache(self):
+        """Precompile and sort replacement tables so apply_replacements doesn't redo it per message."""
+        replacements = self.config.replacements
+        self._replacements_total = sum(len(table) for table in replacements.values())
+        self._has_replacements = self._replacements_total > 0
+        for key in ("view_replacements", "links", "words", "sentences"):
+            self._rendered_lists.pop(key, None)
+        
+        # Links are matched literally in one scan; longest first so overlapping links resolve to the longest match
+        sorted_links = sorted(replacements.get("links", {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self._link_lookup = dict(sorted_links)
+        self._link_pattern = re.compile(
+            '|'.join(re.escape(old_link) for old_link, _ in sorted_links)
+        ) if sorted_links else None
+        
+        # Words are fused into a single alternation so the text is scanned once.
+        # Sort words by length descending so the longer alternative wins when a shorter
+        # word is a prefix of it (e.g., 'carpet' before 'car')
+        sorted_words = sorted(replacements.get("words", {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self._word_lookup = {}
+        for old_word, new_word in sorted_words:
+            self._word_lookup.setdefault(old_word.lower(), new_word)
+        # Use \b for whole word matching to avoid replacing parts of words
+        # re.escape is crucial for words that might contain regex special characters
+        self._word_pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(old_word) for old_word, _ in sorted_words) + r')\b',
+            re.IGNORECASE
+        ) if sorted_words else None
+        
+        # Sentences use the same single-pass approach, but case-sensitive and without \b anchors
+        # since they can start or end on punctuation. Keys are re.escape'd literals, so the
+        # pattern has no nested quantifiers to backtrack on
+        sorted_sentences = sorted(replacements.get("sentences", {}).items(), key=lambda item: len(item[0]), reverse=True)
+        self._sentence_lookup = dict(sorted_sentences)
+        self._sentence_pattern = re.compile(
+            '|'.join(re.escape(old_sentence) for old_sentence, _ in sorted_sentences)
+        ) if sorted_sentences else None
+        
+        # Bind the substitution callbacks once here rather than creating them for every message
+        link_lookup, word_lookup, sentence_lookup = self._link_lookup, self._word_lookup, self._sentence_lookup
+        passes = (
+            (self._link_pattern, lambda m: link_lookup[m.group(0)]),
+            (self._word_pattern, lambda m: word_lookup.get(m.group(0).lower(), m.group(0))),
+            (self._sentence_pattern, lambda m: sentence_lookup[m.group(0)]),
+        )
+        self._replacement_passes = [(pattern.subn, repl) for pattern, repl in passes if pattern is not None]
+    
+    def apply_replacements(self, text: str) -> Tuple[str, bool]:
+        """Apply all text replacements, returning the new text and whether anything was replaced"""
+        if not text or not self._has_replacements:
+            return text, False
         
         modified_text = text
+        replaced = 0 # Total matches across all passes, from re.subn
         
         try:
-            # Apply link replacements
-            for old_link, new_link in self.config.replacements["links"].items():
-                modified_text = modified_text.replace(old_link, new_link)
-            
-            # Apply word replacements (case-insensitive)
-            # Sort words by length descending to prevent partial replacements of longer words
-            # if a shorter word is a substring (e.g., 'car' before 'carpet')
-            sorted_words = sorted(self.config.replacements["words"].items(), key=lambda item: len(item[0]), reverse=True)
-            for old_word, new_word in sorted_words:
-                # Use \b for whole word matching to avoid replacing parts of words
-                # re.escape is crucial for words that might contain regex special characters
-                modified_text = re.sub(r'\b' + re.escape(old_word) + r'\b', new_word, modified_text, flags=re.IGNORECASE)
-            
-            # Apply sentence replacements (case-sensitive as typically desired for sentences)
-            # Sort sentences by length descending for similar reasons as words
-            sorted_sentences = sorted(self.config.replacements["sentences"].items(), key=lambda item: len(item[0]), reverse=True)
-            for old_sentence, new_sentence in sorted_sentences:
-                modified_text = modified_text.replace(old_sentence, new_sentence)
+            # Links, then words (case-insensitive), then sentences (case-sensitive as typically desired)
+            for subn, repl in self._replacement_passes:
+                modified_text, n = subn(repl, modified_text)
+                replaced += n
         except Exception as e:
-            logger.error(f"Error applying replacements: {e}. Original text returned.")
-            return text # Return original text on error
+            logger.error("Error applying replacements: %s. Original text returned.", e)
+            return text, False # Return original text on error
             
-        return modified_text
+        return modified_text, replaced > 0
     
-    async def _send_api_request(self, method: str, payload: Dict):
-        """Helper to send requests to Telegram Bot API with error handling."""
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared client session, creating it on first use."""
+        if self._session is None or self._session.closed:
+            # All traffic goes to one host, so let _request_semaphore be the effective cap; the
+            # overall limit only has to leave room above it. Telegram's IPs rarely change, so
+            # resolved addresses are cached for 10 minutes
+            api_concurrency = max(self.config.max_api_concurrency, 1)
+            connector = aiohttp.TCPConnector(
+                limit=max(500, api_concurrency), limit_per_host=api_concurrency,
+                use_dns_cache=True, ttl_dns_cache=600, keepalive_timeout=75,
+                ssl=_client_ssl_context()
+            )
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def _close_session(self):
+        """Close the shared client session if it is open."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _throttle(self, chat_id: str):
+        """Wait for send capacity in the destination chat's bucket, then the global one."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = AsyncTokenBucket(API_CHAT_RATE, API_CHAT_BURST)
+        await bucket.acquire()
+        await self._global_bucket.acquire()
+
+    async def _send_api_request(self, method: str, payload: Dict, need_result: bool = False,
+                                body: Optional[bytes] = None):
+        """
+        Helper to send requests to Telegram Bot API with error handling.
+        :param need_result: Decode and return the full response body on success. Otherwise a
+                            200 response is reported as {"ok": True} without parsing the JSON.
+        :param body: Already-serialized JSON body to send; payload is then only used for
+                     throttling and log context.
+        """
         url = f"{self.base_url}/{method}"
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload) as response:
-                    if response.status != 200:
-                        logger.error(f"Telegram API request failed for {method} with status {response.status}. Payload: {payload}")
+            # Serialize once, not on every retry attempt
+            if body is None:
+                body = orjson.dumps(payload)
+            session = await self._get_session()
+            for attempt in range(1, API_MAX_ATTEMPTS + 1):
+                if "chat_id" in payload:
+                    await self._throttle(str(payload["chat_id"]))
+                async with self._request_semaphore:
+                    async with session.post(url, data=body, headers=self._JSON_HEADERS) as response:
+                        if response.status == 200:
+                            if not need_result:
+                                # Telegram answers errors with non-200 statuses, so 200 means success.
+                                # Drain the body so the connection goes back to the pool for reuse.
+                                await response.read()
+                                return {"ok": True}
+                            
+                            result = await response.json(loads=orjson.loads)
+                            if not result.get("ok"):
+                                logger.error("Telegram API reported error for %s: %s. Payload: %s", method, result.get('description'), payload)
+                            return result
+                        
+                        logger.error("Telegram API request failed for %s with status %s. Payload: %s", method, response.status, payload)
                         try:
-                            error_response = await response.json()
-                            logger.error(f"API Error Response: {error_response}")
-                            return {"ok": False, "description": error_response.get("description", "Unknown API error")}
-                        except aiohttp.ContentTypeError:
+                            error_response = await response.json(loads=orjson.loads)
+                            logger.error("API Error Response: %s", error_response)
+                        except (aiohttp.ContentTypeError, ValueError):
                             logger.error("API response was not JSON.")
-                            return {"ok": False, "description": "API response not JSON"}
-                    
-                    result = await response.json()
-                    if not result.get("ok"):
-                        logger.error(f"Telegram API reported error for {method}: {result.get('description')}. Payload: {payload}")
-                    return result
+                            error_response = None
+                
+                # Retry flood-control (429) and server errors (5xx) outside the semaphore
+                retryable = response.status == 429 or response.status >= 500
+                if not retryable or attempt == API_MAX_ATTEMPTS:
+                    break
+                if response.status == 429:
+                    parameters = error_response.get("parameters") if isinstance(error_response, dict) else None
+                    delay = parameters.get("retry_after", 1) if isinstance(parameters, dict) else 1
+                    if not isinstance(delay, (int, float)):
+                        delay = 1
+                    if delay > API_MAX_RETRY_AFTER:
+                        logger.warning("Not retrying %s: flood control asks to wait %ss.", method, delay)
+                        break
+                else:
+                    delay = 2 ** attempt + random.random()
+                logger.warning("Retrying %s in %.1fs (attempt %s/%s).", method, delay, attempt, API_MAX_ATTEMPTS)
+                await asyncio.sleep(delay)
+            
+            if error_response is None:
+                return {"ok": False, "description": "API response not JSON"}
+            if not isinstance(error_response, dict):
+                return {"ok": False, "description": "Unknown API error"}
+            return {"ok": False, "description": error_response.get("description", "Unknown API error")}
         except aiohttp.ClientError as e:
-            logger.error(f"Network or client error during API request for {method}: {e}. Payload: {payload}")
+            logger.error("Network or client error during API request for %s: %s. Payload: %s", method, e, payload)
             return {"ok": False, "description": f"Network/Client Error: {e}"}
         except Exception as e:
-            logger.error(f"An unexpected error occurred during API request for {method}: {e}. Payload: {payload}")
+            logger.error("An unexpected error occurred during API request for %s: %s. Payload: %s", method, e, payload)
             return {"ok": False, "description": f"Unexpected Error: {e}"}
 
     async def send_message(self, chat_id: str, text: str, reply_markup=None, parse_mode="HTML"):
-        """Send message via Bot API"""
+        """Send message via Bot API (reply_markup may be a dict or one of the pre-serialized _KB_* keyboards)"""
         payload = {
             "chat_id": chat_id,
             "text": text,
             "parse_mode": parse_mode
         }
-        if reply_markup:
-            payload["reply_markup"] = json.dumps(reply_markup)
+        body = None
+        if isinstance(reply_markup, bytes):
+            # Splice the serialized keyboard into the closing brace instead of re-encoding it
+            body = orjson.dumps(payload)[:-1] + b',"reply_markup":' + reply_markup + b'}'
+        elif reply_markup:
+            payload["reply_markup"] = reply_markup
         
-        return await self._send_api_request("sendMessage", payload)
+        return await self._send_api_request("sendMessage", payload, body=body)
 
     async def answer_callback_query(self, callback_query_id: str, text: str = None, show_alert: bool = False):
         """Answer callback query to remove loading state or show alert"""
@@ -218,38 +641,90 @@ class TelegramForwarderBot:
         
         return await self._send_api_request("copyMessage", payload)
     
-    async def send_photo(self, chat_id: str, photo: str, caption: str = None):
-        """Send photo via Bot API"""
+    async def copy_messages(self, from_chat_id: str, to_chat_id: str, message_ids: List[int]):
+        """Copy several messages in one call, keeping albums grouped"""
         payload = {
-            "chat_id": chat_id,
-            "photo": photo
+            "chat_id": to_chat_id,
+            "from_chat_id": from_chat_id,
+            "message_ids": message_ids
         }
-        if caption is not None:
-            payload["caption"] = caption
-            payload["parse_mode"] = "HTML"
-        return await self._send_api_request("sendPhoto", payload)
+        return await self._send_api_request("copyMessages", payload)
     
-    async def send_document(self, chat_id: str, document: str, caption: str = None):
-        """Send document via Bot API"""
+    async def send_media_group(self, chat_id: str, media: List[Dict]):
+        """Send an album via Bot API"""
         payload = {
             "chat_id": chat_id,
-            "document": document
+            "media": media
         }
-        if caption is not None:
-            payload["caption"] = caption
-            payload["parse_mode"] = "HTML"
-        return await self._send_api_request("sendDocument", payload)
+        return await self._send_api_request("sendMediaGroup", payload)
     
-    async def send_video(self, chat_id: str, video: str, caption: str = None):
-        """Send video via Bot API"""
-        payload = {
-            "chat_id": chat_id,
-            "video": video
+    def setup_commands(self):
+        """Setup admin command and inline button dispatch tables"""
+        self._commands = {
+            "/status": self.cmd_status,
+            "/admin": self.cmd_admin,
+            "/channels": self.cmd_channels,
+            "/target": self.cmd_target,
+            "/replacements": self.cmd_replacements,
+            "/start_forwarding": self.cmd_start_forwarding,
+            "/stop_forwarding": self.cmd_stop_forwarding,
+            "/add_admin": self.cmd_add_admin,
+            "/remove_admin": self.cmd_remove_admin,
+            "/add_channel": self.cmd_add_channel,
+            "/remove_channel": self.cmd_remove_channel,
+            "/set_target": self.cmd_set_target,
+            "/clear_target": self.cmd_clear_target,
+            "/add_link": self.cmd_add_link,
+            "/remove_link": self.cmd_remove_link,
+            "/add_word": self.cmd_add_word,
+            "/remove_word": self.cmd_remove_word,
+            "/add_sentence": self.cmd_add_sentence,
+            "/remove_sentence": self.cmd_remove_sentence,
+            "/clear_replacements": self.cmd_clear_replacements,
+            "/help": self.cmd_help,
+        }
+        
+        # Inline button dispatch table: handlers take (chat_id, user_id); plain strings are sent as-is
+        self._callbacks = {
+            "list_admins": self._cb_list_admins,
+            "list_channels": self._cb_list_channels,
+            "view_replacements": self._cb_view_replacements,
+            
+            # Admin management help buttons
+            "add_admin_help": "To add an admin, send: <code>/add_admin &lt;user_id&gt;</code>",
+            "remove_admin_help": "To remove an admin, send: <code>/remove_admin &lt;user_id&gt;</code>",
+            
+            # Channel management help buttons
+            "add_channel_help": "To add a channel, send: <code>/add_channel @channel_username</code> or <code>/add_channel -1001234567890</code>",
+            "remove_channel_help": "To remove a channel, send: <code>/remove_channel @channel_username</code> or <code>/remove_channel -1001234567890</code>",
+            
+            # Target management clear confirmation
+            "clear_target_confirm": self.cmd_clear_target,
+            
+            # Replacement management buttons
+            "manage_links": self._cb_manage_links,
+            "manage_words": self._cb_manage_words,
+            "manage_sentences": self._cb_manage_sentences,
+            
+            # Help callbacks for additions/removals
+            "add_link_help": self._USAGE_ADD_LINK,
+            "remove_link_help": "Usage: <code>/remove_link old_link</code>",
+            "add_word_help": self._USAGE_ADD_WORD,
+            "remove_word_help": "Usage: <code>/remove_word old_word</code>",
+            "add_sentence_help": self._USAGE_ADD_SENTENCE,
+            "remove_sentence_help": "Usage: <code>/remove_sentence old_sentence</code>",
+            
+            # Clear specific types of replacements via callback
+            "clear_links": partial(self.cmd_clear_replacements, text="/clear_replacements links"),
+            "clear_words": partial(self.cmd_clear_replacements, text="/clear_replacements words"),
+            "clear_sentences": partial(self.cmd_clear_replacements, text="/clear_replacements sentences"),
+            "clear_all_replacements": partial(self.cmd_clear_replacements, text="/clear_replacements all"),
+            
+            # List specific types of replacements via callback
+            "list_links": partial(self._cb_list_replacements, "links"),
+            "list_words": partial(self._cb_list_replacements, "words"),
+            "list_sentences": partial(self._cb_list_replacements, "sentences"),
         }
-        if caption is not None:
-            payload["caption"] = caption
-            payload["parse_mode"] = "HTML"
-        return await self._send_api_request("sendVideo", payload)
     
     def setup_routes(self):
         """Setup webhook routes"""
@@ -257,18 +732,92 @@ class TelegramForwarderBot:
         self.app.router.add_get('/status', self.status_handler)
     
     async def webhook_handler(self, request):
-        """Handle incoming webhooks"""
+        """Handle incoming webhooks: acknowledge right away and process the update in the background"""
         try:
-            data = await request.json()
-            # logger.info(f"Received webhook update: {json.dumps(data, indent=2)}") # Uncomment for debugging
-            await self.process_update(data)
-            return web.Response(text="OK")
+            data = orjson.loads(await request.read())
+            logger.debug("Received webhook update: %s", data) # Formatted only when DEBUG is enabled
+            chat_key = self._update_chat_key(data)
         except json.JSONDecodeError:
             logger.error("Webhook received non-JSON payload.")
             return web.Response(text="Bad Request", status=400)
+        except (AttributeError, KeyError, TypeError):
+            logger.error("Webhook received a payload that is not a valid update.")
+            return web.Response(text="Bad Request", status=400)
         except Exception as e:
-            logger.error(f"Webhook processing error: {e}", exc_info=True) # exc_info for traceback
+            logger.error("Webhook processing error: %s", e, exc_info=True) # exc_info for traceback
             return web.Response(text="Error", status=500)
+        
+        # Only hold back the ack (and so Telegram's next delivery) when this chat's queue is full
+        await self._enqueue_update(chat_key, data)
+        return web.Response(text="OK")
+    
+    @staticmethod
+    def _update_chat_key(update) -> str:
+        """Chat an update belongs to, so updates of one chat are handled in arrival order.
+        Raises KeyError/TypeError/AttributeError for payloads that aren't shaped like an update."""
+        if not isinstance(update, dict):
+            raise TypeError("update is not a JSON object")
+        for field in ("channel_post", "message"):
+            if field in update:
+                return str(update[field]["chat"]["id"])
+        callback_query = update.get("callback_query")
+        if callback_query:
+            message = callback_query.get("message")
+            return str(message["chat"]["id"] if message else callback_query["from"]["id"])
+        return ""
+    
+    async def _enqueue_update(self, chat_key: str, update):
+        """Queue an update for its chat's worker, starting the worker if the chat has none."""
+        queue = self._chat_queues.get(chat_key)
+        if queue is None:
+            queue = self._chat_queues[chat_key] = asyncio.Queue(maxsize=CHAT_QUEUE_SIZE)
+            self._chat_workers[chat_key] = self._spawn(self._chat_worker(chat_key, queue))
+        await queue.put(update)
+    
+    async def _chat_worker(self, chat_key: str, queue: asyncio.Queue):
+        """Process one chat's updates in order until it has been idle for CHAT_WORKER_IDLE_TIMEOUT
+        seconds, or until shutdown once the queue is empty."""
+        try:
+            while True:
+                if self._draining and queue.empty():
+                    break
+                try:
+                    update = await asyncio.wait_for(queue.get(), CHAT_WORKER_IDLE_TIMEOUT)
+                except asyncio.TimeoutError:
+                    # An update can be queued just as the timeout fires (the cancelled get() leaves
+                    # it in the queue), so only stop when the queue is really empty
+                    if queue.empty():
+                        break
+                    continue
+                if update is None:
+                    continue # Shutdown wake-up; the check at the top decides whether to stop
+                await self._dispatch_update(update)
+        finally:
+            # The emptiness checks above are not followed by an await, so no update can have been
+            # queued since; dropping the queue loses nothing
+            self._chat_queues.pop(chat_key, None)
+            self._chat_workers.pop(chat_key, None)
+    
+    async def _dispatch_update(self, update):
+        """Process one webhook update once a processing slot is free."""
+        async with self._update_semaphore:
+            await self.process_update(update)
+    
+    def _spawn(self, coro) -> asyncio.Task:
+        """Run a coroutine in the background, keeping a reference until it finishes."""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def _drain_background_tasks(self):
+        """Wait for in-flight updates and album flushes so nothing is dropped on shutdown."""
+        # Chat workers stop once their queue is empty; idle ones are woken with a None marker
+        self._draining = True
+        for queue in list(self._chat_queues.values()):
+            await queue.put(None)
+        while self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
     
     async def status_handler(self, request):
         """Status endpoint"""
@@ -278,9 +827,11 @@ class TelegramForwarderBot:
             "source_channels_count": len(self.config.source_channels),
             "target_channel": self.config.target_channel if self.config.target_channel else "Not Set",
             "admin_users_count": len(self.config.admin_users),
-            "active_replacements_count": sum(len(r) for r in self.config.replacements.values())
+            "active_replacements_count": self._replacements_total
         }
-        return web.json_response(status)
+        response = json_response(status)
+        response.enable_compression() # Negotiated from Accept-Encoding; the tiny webhook "OK" isn't worth compressing
+        return response
     
     async def process_update(self, update):
         """Process incoming update"""
@@ -298,7 +849,7 @@ class TelegramForwarderBot:
                 await self.handle_callback_query(update["callback_query"])
                 
         except Exception as e:
-            logger.error(f"Error processing update: {e}", exc_info=True)
+            logger.error("Error processing update: %s", e, exc_info=True)
     
     async def handle_channel_post(self, post):
         """Handle channel post (forwarding logic)"""
@@ -313,25 +864,89 @@ class TelegramForwarderBot:
         channel_id = str(post["chat"]["id"])
         channel_username = post["chat"].get("username", "")
         
-        # Check if this channel is in our source list
-        is_source_channel = False
-        for source in self.config.source_channels:
-            # Normalize source channel for comparison (e.g., remove '@' if present)
-            normalized_source = source.lstrip('@')
-            if (str(channel_id) == normalized_source or 
-                channel_username.lower() == normalized_source.lower()): # Case-insensitive for username
-                is_source_channel = True
-                break
+        # Check if this channel is in our source list (sources are stored '@'-stripped and lower-cased)
+        is_source_channel = (channel_id in self._channel_index or
+                             (channel_username and channel_username.lower() in self._channel_index)) # Case-insensitive for username
         
         if not is_source_channel:
-            logger.debug(f"Channel {channel_username or channel_id} is not a configured source channel.")
+            logger.debug("Channel %s is not a configured source channel.", channel_username or channel_id)
+            return
+        
+        # A post that isn't part of the album being buffered waits for that album to go out,
+        # so the target keeps the source channel's order
+        album_flush = self._album_flushes.get(channel_id)
+        if album_flush is not None and (channel_id, post.get("media_group_id")) not in self._media_groups:
+            await album_flush
+        
+        # Album parts are collected and forwarded together once the group is complete
+        if "media_group_id" in post:
+            self._buffer_media_group(post)
             return
         
         try:
             await self.forward_channel_message(post)
-            logger.info(f"Forwarded message from {channel_username or channel_id} to {self.config.target_channel}")
+            logger.info("Forwarded message from %s to %s", channel_username or channel_id, self.config.target_channel)
+        except Exception as e:
+            logger.error("Error forwarding channel message from %s: %s", channel_username or channel_id, e, exc_info=True)
+    
+    def _buffer_media_group(self, post):
+        """Add an album post to its group, scheduling the group flush on its first part."""
+        key = (str(post["chat"]["id"]), post["media_group_id"])
+        group = self._media_groups.get(key)
+        if group is not None:
+            group.append(post)
+            return
+        
+        self._media_groups[key] = [post]
+        self._album_flushes[key[0]] = self._spawn(self._flush_media_group(key))
+    
+    async def _flush_media_group(self, key: Tuple[str, str]):
+        """Forward a buffered album once no new parts have arrived for MEDIA_GROUP_WINDOW."""
+        from_chat_id, media_group_id = key
+        try:
+            # Sliding window: keep waiting while parts are still arriving
+            seen = 0
+            while len(self._media_groups[key]) != seen:
+                seen = len(self._media_groups[key])
+                await asyncio.sleep(MEDIA_GROUP_WINDOW)
+            
+            posts = sorted(self._media_groups.pop(key), key=lambda p: p["message_id"])
+            to_chat_id = self.config.target_channel
+            
+            captions = [self.apply_replacements(p.get("caption", "")) for p in posts]
+            if not any(modified for _, modified in captions):
+                await self.copy_messages(from_chat_id, to_chat_id, [p["message_id"] for p in posts])
+            else:
+                media = []
+                for post, (caption, _) in zip(posts, captions):
+                    if post.get("photo"):
+                        item = {"type": "photo", "media": post["photo"][-1]["file_id"]} # Largest photo
+                    elif post.get("video"):
+                        item = {"type": "video", "media": post["video"]["file_id"]}
+                    elif post.get("document"):
+                        item = {"type": "document", "media": post["document"]["file_id"]}
+                    elif post.get("audio"):
+                        item = {"type": "audio", "media": post["audio"]["file_id"]}
+                    else:
+                        break
+                    if caption:
+                        item["caption"] = caption
+                        item["parse_mode"] = "HTML"
+                    media.append(item)
+                
+                if len(media) == len(posts):
+                    await self.send_media_group(to_chat_id, media)
+                else:
+                    # Unknown album item type, fall back to forwarding parts one by one
+                    for post in posts:
+                        await self.forward_channel_message(post)
+            logger.info("Forwarded album %s (%s messages) from %s to %s", media_group_id, len(posts), from_chat_id, to_chat_id)
         except Exception as e:
-            logger.error(f"Error forwarding channel message from {channel_username or channel_id}: {e}", exc_info=True)
+            self._media_groups.pop(key, None)
+            logger.error("Error forwarding album %s from %s: %s", media_group_id, from_chat_id, e, exc_info=True)
+        finally:
+            if self._album_flushes.get(from_chat_id) is asyncio.current_task():
+                del self._album_flushes[from_chat_id]
     
     async def forward_channel_message(self, post):
         """Forward channel message with replacements"""
@@ -342,59 +957,19 @@ class TelegramForwarderBot:
         original_text = post.get("text", "")
         original_caption = post.get("caption", "")
         
-        # Apply replacements
-        new_text = self.apply_replacements(original_text)
-        new_caption = self.apply_replacements(original_caption)
-        
-        # Determine if text/caption was modified
-        text_modified = new_text != original_text
-        caption_modified = new_caption != original_caption
-        
-        # Determine if message can be copied with caption or text
-        # If original text/caption exists AND modified, we use send_message/send_photo/etc.
-        # If original text/caption doesn't exist or not modified, we use copy_message if possible
-        
-        if post.get("photo"):
-            photo_file_id = post["photo"][-1]["file_id"]  # Get largest photo
-            if caption_modified:
-                await self.send_photo(to_chat_id, photo_file_id, new_caption)
-            else:
-                await self.copy_message(from_chat_id, to_chat_id, message_id)
-        
-        elif post.get("video"):
-            video_file_id = post["video"]["file_id"]
-            if caption_modified:
-                await self.send_video(to_chat_id, video_file_id, new_caption)
-            else:
-                await self.copy_message(from_chat_id, to_chat_id, message_id)
-        
-        elif post.get("document"):
-            document_file_id = post["document"]["file_id"]
-            if caption_modified:
-                await self.send_document(to_chat_id, document_file_id, new_caption)
-            else:
-                await self.copy_message(from_chat_id, to_chat_id, message_id)
-        
-        elif post.get("animation"):
-            animation_file_id = post["animation"]["file_id"]
-            if caption_modified:
-                await self.send_document(to_chat_id, animation_file_id, new_caption) # Animation is sent as document
-            else:
-                await self.copy_message(from_chat_id, to_chat_id, message_id)
+        # Apply replacements; the flags report whether any replacement matched
+        new_text, text_modified = self.apply_replacements(original_text)
+        new_caption, caption_modified = self.apply_replacements(original_caption)
         
-        elif post.get("text"): # Handle text messages (no other media)
-            if text_modified:
-                await self.send_message(to_chat_id, new_text)
-            else:
-                await self.copy_message(from_chat_id, to_chat_id, message_id)
+        # Media never passes through the bot: copyMessage has Telegram duplicate it server-side,
+        # so only text messages whose text changed need to be sent anew
+        if text_modified: # Handle text messages (no other media)
+            await self.send_message(to_chat_id, new_text)
+            return
         
-        else: # Handle other message types that might have only a caption, or no text/caption at all (e.g., stickers, voice, etc.)
-            # If there was an original caption and it was modified, use copy_message with the new caption
-            # Otherwise, just copy the message as is
-            if original_caption and caption_modified:
-                await self.copy_message(from_chat_id, to_chat_id, message_id, new_caption)
-            else:
-                await self.copy_message(from_chat_id, to_chat_id, message_id)
+        # Caption was modified: copy with the caption overridden, which keeps the media type
+        # (animations stay animations) and works for every captioned message kind
+        await self.copy_message(from_chat_id, to_chat_id, message_id, new_caption if caption_modified else None)
     
     async def handle_message(self, message):
         """Handle private messages (bot commands)"""
@@ -405,8 +980,11 @@ class TelegramForwarderBot:
         user_id = message["from"]["id"]
         chat_id = str(message["chat"]["id"])
         
+        # Command name is the first token, without any "@BotName" suffix
+        command = text.split(None, 1)[0].split('@', 1)[0] if text else ""
+        
         # Commands that don't require admin (e.g., initial setup, or if you had public commands)
-        if text.startswith("/start"):
+        if command == "/start":
             # Only allow if no admins configured yet, or if user is an admin
             if not self.config.admin_users:
                 # First run setup for admin
@@ -419,67 +997,29 @@ class TelegramForwarderBot:
                 self._expecting_first_admin_id = chat_id
                 return
             await self.cmd_start(chat_id, user_id)
+        elif self._expecting_first_admin_id == chat_id and not self.config.admin_users:
+            # First run: this chat ran /start and should now be sending the first admin's ID
+            potential_admin_id = self._parse_user_id(text)
+            if potential_admin_id is None:
+                await self.send_message(chat_id, "❌ Invalid User ID. Please send a valid number.")
+                return
+            self.config.admin_users.append(potential_admin_id)
+            self._admin_set.add(potential_admin_id)
+            self._rendered_lists.pop("admins", None)
+            self.save_config()
+            self._expecting_first_admin_id = None # Clear the flag
+            await self.send_message(chat_id, 
+                f"🎉 Success! User ID <code>{potential_admin_id}</code> has been set as the first admin."
+                "\nYou can now use /start to see available commands."
+            )
+            logger.info("Initial admin set to %s", potential_admin_id)
         elif self.is_admin(user_id):
             # Command routing for admins
-            if text.startswith("/status"):
-                await self.cmd_status(chat_id, user_id)
-            elif text.startswith("/admin"):
-                await self.cmd_admin(chat_id, user_id)
-            elif text.startswith("/channels"):
-                await self.cmd_channels(chat_id, user_id)
-            elif text.startswith("/target"):
-                await self.cmd_target(chat_id, user_id)
-            elif text.startswith("/replacements"):
-                await self.cmd_replacements(chat_id, user_id)
-            elif text.startswith("/start_forwarding"):
-                await self.cmd_start_forwarding(chat_id, user_id)
-            elif text.startswith("/stop_forwarding"):
-                await self.cmd_stop_forwarding(chat_id, user_id)
-            elif text.startswith("/add_admin"):
-                await self.cmd_add_admin(chat_id, user_id, text)
-            elif text.startswith("/remove_admin"):
-                await self.cmd_remove_admin(chat_id, user_id, text)
-            elif text.startswith("/add_channel"):
-                await self.cmd_add_channel(chat_id, user_id, text)
-            elif text.startswith("/remove_channel"):
-                await self.cmd_remove_channel(chat_id, user_id, text)
-            elif text.startswith("/set_target"):
-                await self.cmd_set_target(chat_id, user_id, text)
-            elif text.startswith("/clear_target"):
-                await self.cmd_clear_target(chat_id, user_id)
-            elif text.startswith("/add_link"):
-                await self.cmd_add_link(chat_id, user_id, text)
-            elif text.startswith("/remove_link"):
-                await self.cmd_remove_link(chat_id, user_id, text)
-            elif text.startswith("/add_word"):
-                await self.cmd_add_word(chat_id, user_id, text)
-            elif text.startswith("/remove_word"):
-                await self.cmd_remove_word(chat_id, user_id, text)
-            elif text.startswith("/add_sentence"):
-                await self.cmd_add_sentence(chat_id, user_id, text)
-            elif text.startswith("/remove_sentence"):
-                await self.cmd_remove_sentence(chat_id, user_id, text)
-            elif text.startswith("/clear_replacements"):
-                await self.cmd_clear_replacements(chat_id, user_id, text)
-            elif text.startswith("/help"):
-                await self.cmd_help(chat_id, user_id)
+            handler = self._commands.get(command)
+            if handler is not None:
+                await handler(chat_id, user_id, text)
             else:
-                # If first run and expecting admin ID
-                if not self.config.admin_users and hasattr(self, '_expecting_first_admin_id') and self._expecting_first_admin_id == chat_id:
-                    try:
-                        potential_admin_id = int(text.strip())
-                        self.config.admin_users.append(potential_admin_id)
-                        self.save_config()
-                        del self._expecting_first_admin_id # Clear the flag
-                        await self.send_message(chat_id, 
-                            f"🎉 Success! User ID <code>{potential_admin_id}</code> has been set as the first admin."
-                            "\nYou can now use /start to see available commands."
-                        )
-                        logger.info(f"Initial admin set to {potential_admin_id}")
-                    except ValueError:
-                        await self.send_message(chat_id, "❌ Invalid User ID. Please send a valid number.")
-                else:
-                    await self.send_message(chat_id, "🤷‍♂️ Unknown command. Use /help for a list of commands.")
+                await self.send_message(chat_id, "🤷‍♂️ Unknown command. Use /help for a list of commands.")
         else:
             await self.send_message(chat_id, "❌ You are not authorized to use this bot. Contact an admin.")
     
@@ -506,7 +1046,7 @@ Ready to forward messages! 🚀
         """
         await self.send_message(chat_id, welcome_msg)
     
-    async def cmd_status(self, chat_id: str, user_id: int):
+    async def cmd_status(self, chat_id: str, user_id: int, text: str = ""):
         """Status command handler"""
         forwarding_status = "✅ Active" if self.config.forwarding_enabled else "❌ Inactive"
         
@@ -517,7 +1057,7 @@ Ready to forward messages! 🚀
 🔄 Forwarding: {forwarding_status}
 📢 Source Channels: {len(self.config.source_channels)}
 🎯 Target Channel: {"✅ Set" if self.config.target_channel else "❌ Not Set"}
-🔧 Active Replacements: {sum(len(r) for r in self.config.replacements.values())}
+🔧 Active Replacements: {self._replacements_total}
 
 <b>Webhook Mode:</b> ✅ Active
 <b>Source Channels:</b>
@@ -525,37 +1065,19 @@ Ready to forward messages! 🚀
         """
         await self.send_message(chat_id, status_msg)
     
-    async def cmd_admin(self, chat_id: str, user_id: int):
+    async def cmd_admin(self, chat_id: str, user_id: int, text: str = ""):
         """Admin command handler"""
-        keyboard = {
-            "inline_keyboard": [
-                [{"text": "➕ Add Admin", "callback_data": "add_admin_help"}, 
-                 {"text": "➖ Remove Admin", "callback_data": "remove_admin_help"}],
-                [{"text": "📋 List Admins", "callback_data": "list_admins"}]
-            ]
-        }
-        await self.send_message(chat_id, "👥 <b>Admin Management</b>", keyboard)
+        await self.send_message(chat_id, "👥 <b>Admin Management</b>", self._KB_ADMIN)
     
-    async def cmd_channels(self, chat_id: str, user_id: int):
+    async def cmd_channels(self, chat_id: str, user_id: int, text: str = ""):
         """Channels command handler"""
-        keyboard = {
-            "inline_keyboard": [
-                [{"text": "➕ Add Channel", "callback_data": "add_channel_help"}, 
-                 {"text": "➖ Remove Channel", "callback_data": "remove_channel_help"}],
-                [{"text": "📋 List Channels", "callback_data": "list_channels"}]
-            ]
-        }
-        await self.send_message(chat_id, "📢 <b>Source Channels Management</b>", keyboard)
+        await self.send_message(chat_id, "📢 <b>Source Channels Management</b>", self._KB_CHANNELS)
     
-    async def cmd_target(self, chat_id: str, user_id: int):
+    async def cmd_target(self, chat_id: str, user_id: int, text: str = ""):
         """Target command handler (updated)"""
         current_target = self.config.target_channel or "Not set"
         
-        keyboard_buttons = []
-        if self.config.target_channel:
-            keyboard_buttons.append([{"text": "🗑️ Clear Target", "callback_data": "clear_target_confirm"}])
-        
-        keyboard = {"inline_keyboard": keyboard_buttons} if keyboard_buttons else None
+        keyboard = self._KB_TARGET if self.config.target_channel else None
         
         msg = f"""
 🎯 <b>Target Channel Management</b>
@@ -574,20 +1096,11 @@ To clear target channel, send:
         """
         await self.send_message(chat_id, msg, keyboard)
     
-    async def cmd_replacements(self, chat_id: str, user_id: int):
+    async def cmd_replacements(self, chat_id: str, user_id: int, text: str = ""):
         """Replacements command handler"""
-        keyboard = {
-            "inline_keyboard": [
-                [{"text": "🔗 Links", "callback_data": "manage_links"}, 
-                 {"text": "📝 Words", "callback_data": "manage_words"}],
-                [{"text": "📄 Sentences", "callback_data": "manage_sentences"}],
-                [{"text": "📋 View All", "callback_data": "view_replacements"},
-                 {"text": "🗑️ Clear All", "callback_data": "clear_all_replacements"}]
-            ]
-        }
-        await self.send_message(chat_id, "🔧 <b>Text Replacements Management</b>", keyboard)
+        await self.send_message(chat_id, "🔧 <b>Text Replacements Management</b>", self._KB_REPLACEMENTS)
     
-    async def cmd_start_forwarding(self, chat_id: str, user_id: int):
+    async def cmd_start_forwarding(self, chat_id: str, user_id: int, text: str = ""):
         """Start forwarding command handler"""
         if not self.config.target_channel:
             await self.send_message(chat_id, "❌ Target channel not set. Use /target first.")
@@ -602,14 +1115,14 @@ To clear target channel, send:
         
         await self.send_message(chat_id, "✅ Forwarding started! The bot will now forward messages from source channels.")
     
-    async def cmd_stop_forwarding(self, chat_id: str, user_id: int):
+    async def cmd_stop_forwarding(self, chat_id: str, user_id: int, text: str = ""):
         """Stop forwarding command handler"""
         self.config.forwarding_enabled = False
         self.save_config()
         
         await self.send_message(chat_id, "⏹️ Forwarding stopped!")
     
-    async def cmd_help(self, chat_id: str, user_id: int):
+    async def cmd_help(self, chat_id: str, user_id: int, text: str = ""):
         """Help command handler (updated)"""
         help_msg = """
 ❓ <b>Help - Command Examples</b>
@@ -663,132 +1176,134 @@ To clear target channel, send:
     async def cmd_add_admin(self, chat_id: str, user_id: int, text: str):
         """Add admin command handler"""
         try:
-            parts = text.split()
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/add_admin 123456789</code>")
                 return
             
-            new_admin_id = int(parts[1])
-            if new_admin_id not in self.config.admin_users:
+            new_admin_id = self._parse_user_id(arg)
+            if new_admin_id is None:
+                await self.send_message(chat_id, "❌ Invalid user ID. Use numbers only.")
+                return
+            if new_admin_id not in self._admin_set:
                 self.config.admin_users.append(new_admin_id)
+                self._admin_set.add(new_admin_id)
+                self._rendered_lists.pop("admins", None)
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Added admin: <code>{new_admin_id}</code>")
-                logger.info(f"Admin {user_id} added new admin {new_admin_id}.")
+                logger.info("Admin %s added new admin %s.", user_id, new_admin_id)
             else:
                 await self.send_message(chat_id, f"ℹ️ User <code>{new_admin_id}</code> is already an admin.")
-        except ValueError:
-            await self.send_message(chat_id, "❌ Invalid user ID. Use numbers only.")
         except Exception as e:
-            logger.error(f"Error in cmd_add_admin: {e}", exc_info=True)
+            logger.error("Error in cmd_add_admin: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while adding admin.")
 
     async def cmd_remove_admin(self, chat_id: str, user_id: int, text: str):
         """Remove admin command handler (new)"""
         try:
-            parts = text.split()
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/remove_admin 123456789</code>")
                 return
             
-            admin_to_remove = int(parts[1])
+            admin_to_remove = self._parse_user_id(arg)
+            if admin_to_remove is None:
+                await self.send_message(chat_id, "❌ Invalid user ID. Use numbers only.")
+                return
             if admin_to_remove == user_id:
                 await self.send_message(chat_id, "❌ You cannot remove yourself as an admin.")
                 return
             
-            if admin_to_remove in self.config.admin_users:
+            if admin_to_remove in self._admin_set:
                 self.config.admin_users.remove(admin_to_remove)
+                self._admin_set.discard(admin_to_remove)
+                self._rendered_lists.pop("admins", None)
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Removed admin: <code>{admin_to_remove}</code>")
-                logger.info(f"Admin {user_id} removed admin {admin_to_remove}.")
+                logger.info("Admin %s removed admin %s.", user_id, admin_to_remove)
             else:
                 await self.send_message(chat_id, f"ℹ️ User <code>{admin_to_remove}</code> is not an admin.")
-        except ValueError:
-            await self.send_message(chat_id, "❌ Invalid user ID. Use numbers only.")
         except Exception as e:
-            logger.error(f"Error in cmd_remove_admin: {e}", exc_info=True)
+            logger.error("Error in cmd_remove_admin: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while removing admin.")
     
     async def cmd_add_channel(self, chat_id: str, user_id: int, text: str):
         """Add channel command handler"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/add_channel @channelname</code> or <code>/add_channel -1001234567890</code>")
                 return
             
-            channel = parts[1].strip()
-            # Normalize channel input for storage and comparison (remove leading '@')
-            if channel.startswith('@'):
-                channel = channel[1:]
-            
-            if channel not in [ch.lstrip('@') for ch in self.config.source_channels]: # Compare normalized
+            # Normalize channel input for storage (remove leading '@')
+            channel = arg.lstrip('@')
+            channel_key = self._channel_key(channel)
+            if channel_key not in self._channel_index: # Compare normalized
                 self.config.source_channels.append(channel)
+                self._channel_index[channel_key] = channel
+                self._rendered_lists.pop("channels", None)
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Added source channel: <code>{channel}</code>")
-                logger.info(f"Admin {user_id} added source channel {channel}.")
+                logger.info("Admin %s added source channel %s.", user_id, channel)
             else:
                 await self.send_message(chat_id, f"ℹ️ Channel <code>{channel}</code> already added.")
         except Exception as e:
-            logger.error(f"Error in cmd_add_channel: {e}", exc_info=True)
+            logger.error("Error in cmd_add_channel: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while adding channel.")
 
     async def cmd_remove_channel(self, chat_id: str, user_id: int, text: str):
         """Remove channel command handler (new)"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/remove_channel @channelname</code> or <code>/remove_channel -1001234567890</code>")
                 return
             
-            channel_to_remove = parts[1].strip()
-            if channel_to_remove.startswith('@'):
-                channel_to_remove = channel_to_remove[1:]
+            channel_to_remove = arg.lstrip('@')
             
-            # Find the exact channel string in the list, as it might have been stored with or without '@'
-            found_channel = None
-            for ch in self.config.source_channels:
-                if ch.lstrip('@').lower() == channel_to_remove.lower():
-                    found_channel = ch
-                    break
+            # The index maps to the exact channel string in the list, as it might have been stored with or without '@'
+            found_channel = self._channel_index.pop(self._channel_key(channel_to_remove), None)
 
             if found_channel:
                 self.config.source_channels.remove(found_channel)
+                self._rendered_lists.pop("channels", None)
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Removed source channel: <code>{found_channel}</code>")
-                logger.info(f"Admin {user_id} removed source channel {found_channel}.")
+                logger.info("Admin %s removed source channel %s.", user_id, found_channel)
             else:
                 await self.send_message(chat_id, f"ℹ️ Channel <code>{channel_to_remove}</code> not found in source channels.")
         except Exception as e:
-            logger.error(f"Error in cmd_remove_channel: {e}", exc_info=True)
+            logger.error("Error in cmd_remove_channel: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while removing channel.")
     
     async def cmd_set_target(self, chat_id: str, user_id: int, text: str):
         """Set target command handler"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/set_target @channelname</code> or <code>/set_target -1001234567890</code>")
                 return
             
-            target = parts[1].strip()
+            target = arg
             # Normalize target channel input (remove leading '@')
             if target.startswith('@'):
                 target = target[1:]
             
-            if self.config.target_channel == target:
-                await self.send_message(chat_id, f"ℹ️ Target channel is already set to: <code>{target}</code>")
+            # Channel usernames are case-insensitive, so '@Foo' over 'foo' is not a change
+            if self._channel_key(self.config.target_channel) == self._channel_key(target):
+                await self.send_message(chat_id, f"ℹ️ Target channel is already set to: <code>{self.config.target_channel}</code>")
                 return
 
             self.config.target_channel = target
             self.save_config()
             
             await self.send_message(chat_id, f"✅ Target channel set to: <code>{target}</code>")
-            logger.info(f"Admin {user_id} set target channel to {target}.")
+            logger.info("Admin %s set target channel to %s.", user_id, target)
         except Exception as e:
-            logger.error(f"Error in cmd_set_target: {e}", exc_info=True)
+            logger.error("Error in cmd_set_target: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while setting target channel.")
 
-    async def cmd_clear_target(self, chat_id: str, user_id: int):
+    async def cmd_clear_target(self, chat_id: str, user_id: int, text: str = ""):
         """Clear target channel (new)"""
         if not self.config.target_channel:
             await self.send_message(chat_id, "ℹ️ No target channel is currently set.")
@@ -804,17 +1319,16 @@ To clear target channel, send:
         
         self.save_config()
         await self.send_message(chat_id, f"✅ Target channel cleared. Previous target was: <code>{old_target}</code>")
-        logger.info(f"Admin {user_id} cleared target channel ({old_target}).")
+        logger.info("Admin %s cleared target channel (%s).", user_id, old_target)
     
     async def cmd_add_link(self, chat_id: str, user_id: int, text: str):
         """Add link replacement handler"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2 or '|' not in parts[1]:
-                await self.send_message(chat_id, "Usage: <code>/add_link old_link|new_link</code>")
+            old_link, sep, new_link = self._command_arg(text).partition('|')
+            if not sep:
+                await self.send_message(chat_id, self._USAGE_ADD_LINK)
                 return
             
-            old_link, new_link = parts[1].split('|', 1)
             old_link = old_link.strip()
             new_link = new_link.strip()
             
@@ -822,45 +1336,50 @@ To clear target channel, send:
                 await self.send_message(chat_id, "❌ Both old and new link must be provided.")
                 return
 
+            if self.config.replacements["links"].get(old_link) == new_link:
+                await self.send_message(chat_id, f"ℹ️ Link replacement already exists:\n<code>{old_link}</code> → <code>{new_link}</code>")
+                return
+            
             self.config.replacements["links"][old_link] = new_link
+            self._rebuild_replacement_cache()
             self.save_config()
             await self.send_message(chat_id, f"✅ Added link replacement:\n<code>{old_link}</code> → <code>{new_link}</code>")
-            logger.info(f"Admin {user_id} added link replacement: {old_link} -> {new_link}.")
+            logger.info("Admin %s added link replacement: %s -> %s.", user_id, old_link, new_link)
         except Exception as e:
-            logger.error(f"Error in cmd_add_link: {e}", exc_info=True)
+            logger.error("Error in cmd_add_link: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while adding link replacement.")
 
     async def cmd_remove_link(self, chat_id: str, user_id: int, text: str):
         """Remove specific link replacement (new)"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/remove_link &lt;old_link&gt;</code>")
                 return
             
-            old_link = parts[1].strip()
+            old_link = arg
             
             if old_link in self.config.replacements["links"]:
                 removed_replacement = self.config.replacements["links"][old_link]
                 del self.config.replacements["links"][old_link]
+                self._rebuild_replacement_cache()
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Removed link replacement:\n<code>{old_link}</code> → <code>{removed_replacement}</code>")
-                logger.info(f"Admin {user_id} removed link replacement: {old_link}.")
+                logger.info("Admin %s removed link replacement: %s.", user_id, old_link)
             else:
                 await self.send_message(chat_id, f"❌ Link replacement not found: <code>{old_link}</code>")
         except Exception as e:
-            logger.error(f"Error in cmd_remove_link: {e}", exc_info=True)
+            logger.error("Error in cmd_remove_link: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while removing link replacement.")
     
     async def cmd_add_word(self, chat_id: str, user_id: int, text: str):
         """Add word replacement handler"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2 or '|' not in parts[1]:
-                await self.send_message(chat_id, "Usage: <code>/add_word old_word|new_word</code>")
+            old_word, sep, new_word = self._command_arg(text).partition('|')
+            if not sep:
+                await self.send_message(chat_id, self._USAGE_ADD_WORD)
                 return
             
-            old_word, new_word = parts[1].split('|', 1)
             old_word = old_word.strip()
             new_word = new_word.strip()
 
@@ -868,45 +1387,50 @@ To clear target channel, send:
                 await self.send_message(chat_id, "❌ Both old and new word must be provided.")
                 return
             
+            if self.config.replacements["words"].get(old_word) == new_word:
+                await self.send_message(chat_id, f"ℹ️ Word replacement already exists:\n<code>{old_word}</code> → <code>{new_word}</code>")
+                return
+            
             self.config.replacements["words"][old_word] = new_word
+            self._rebuild_replacement_cache()
             self.save_config()
             await self.send_message(chat_id, f"✅ Added word replacement:\n<code>{old_word}</code> → <code>{new_word}</code>")
-            logger.info(f"Admin {user_id} added word replacement: {old_word} -> {new_word}.")
+            logger.info("Admin %s added word replacement: %s -> %s.", user_id, old_word, new_word)
         except Exception as e:
-            logger.error(f"Error in cmd_add_word: {e}", exc_info=True)
+            logger.error("Error in cmd_add_word: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while adding word replacement.")
 
     async def cmd_remove_word(self, chat_id: str, user_id: int, text: str):
         """Remove specific word replacement (new)"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/remove_word &lt;old_word&gt;</code>")
                 return
             
-            old_word = parts[1].strip()
+            old_word = arg
             
             if old_word in self.config.replacements["words"]:
                 removed_replacement = self.config.replacements["words"][old_word]
                 del self.config.replacements["words"][old_word]
+                self._rebuild_replacement_cache()
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Removed word replacement:\n<code>{old_word}</code> → <code>{removed_replacement}</code>")
-                logger.info(f"Admin {user_id} removed word replacement: {old_word}.")
+                logger.info("Admin %s removed word replacement: %s.", user_id, old_word)
             else:
                 await self.send_message(chat_id, f"❌ Word replacement not found: <code>{old_word}</code>")
         except Exception as e:
-            logger.error(f"Error in cmd_remove_word: {e}", exc_info=True)
+            logger.error("Error in cmd_remove_word: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while removing word replacement.")
     
     async def cmd_add_sentence(self, chat_id: str, user_id: int, text: str):
         """Add sentence replacement handler"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2 or '|' not in parts[1]:
-                await self.send_message(chat_id, "Usage: <code>/add_sentence old_sentence|new_sentence</code>")
+            old_sentence, sep, new_sentence = self._command_arg(text).partition('|')
+            if not sep:
+                await self.send_message(chat_id, self._USAGE_ADD_SENTENCE)
                 return
             
-            old_sentence, new_sentence = parts[1].split('|', 1)
             old_sentence = old_sentence.strip()
             new_sentence = new_sentence.strip()
 
@@ -914,55 +1438,57 @@ To clear target channel, send:
                 await self.send_message(chat_id, "❌ Both old and new sentence must be provided.")
                 return
             
+            if len(old_sentence) < MIN_SENTENCE_LENGTH:
+                await self.send_message(chat_id, f"❌ Sentence must be at least {MIN_SENTENCE_LENGTH} characters. Use <code>/add_word</code> for shorter replacements.")
+                return
+            
+            if self.config.replacements["sentences"].get(old_sentence) == new_sentence:
+                await self.send_message(chat_id, f"ℹ️ Sentence replacement already exists:\n<code>{old_sentence}</code> → <code>{new_sentence}</code>")
+                return
+            
             self.config.replacements["sentences"][old_sentence] = new_sentence
+            self._rebuild_replacement_cache()
             self.save_config()
             await self.send_message(chat_id, f"✅ Added sentence replacement:\n<code>{old_sentence}</code> → <code>{new_sentence}</code>")
-            logger.info(f"Admin {user_id} added sentence replacement: {old_sentence} -> {new_sentence}.")
+            logger.info("Admin %s added sentence replacement: %s -> %s.", user_id, old_sentence, new_sentence)
         except Exception as e:
-            logger.error(f"Error in cmd_add_sentence: {e}", exc_info=True)
+            logger.error("Error in cmd_add_sentence: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while adding sentence replacement.")
 
     async def cmd_remove_sentence(self, chat_id: str, user_id: int, text: str):
         """Remove specific sentence replacement (new)"""
         try:
-            parts = text.split(None, 1)
-            if len(parts) != 2:
+            arg = self._command_arg(text)
+            if not arg:
                 await self.send_message(chat_id, "Usage: <code>/remove_sentence &lt;old_sentence&gt;</code>")
                 return
             
-            old_sentence = parts[1].strip()
+            old_sentence = arg
             
             if old_sentence in self.config.replacements["sentences"]:
                 removed_replacement = self.config.replacements["sentences"][old_sentence]
                 del self.config.replacements["sentences"][old_sentence]
+                self._rebuild_replacement_cache()
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Removed sentence replacement:\n<code>{old_sentence}</code> → <code>{removed_replacement}</code>")
-                logger.info(f"Admin {user_id} removed sentence replacement: {old_sentence}.")
+                logger.info("Admin %s removed sentence replacement: %s.", user_id, old_sentence)
             else:
                 await self.send_message(chat_id, f"❌ Sentence replacement not found: <code>{old_sentence}</code>")
         except Exception as e:
-            logger.error(f"Error in cmd_remove_sentence: {e}", exc_info=True)
+            logger.error("Error in cmd_remove_sentence: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while removing sentence replacement.")
 
     async def cmd_clear_replacements(self, chat_id: str, user_id: int, text: str):
         """Clear replacements command handler (new)"""
-        parts = text.split()
-        if len(parts) == 1:
+        replacement_type = self._command_arg(text).lower()
+        if not replacement_type:
             # Show help
-            await self.send_message(chat_id, """
-Usage:
-<code>/clear_replacements all</code> - Clear all replacements
-<code>/clear_replacements links</code> - Clear link replacements
-<code>/clear_replacements words</code> - Clear word replacements  
-<code>/clear_replacements sentences</code> - Clear sentence replacements
-            """)
+            await self.send_message(chat_id, self._USAGE_CLEAR_REPLACEMENTS)
             return
         
-        replacement_type = parts[1].lower()
-        
         try:
             if replacement_type == "all":
-                total_count = sum(len(r) for r in self.config.replacements.values())
+                total_count = self._replacements_total
                 if total_count == 0:
                     await self.send_message(chat_id, "ℹ️ No replacements to clear.")
                     return
@@ -972,9 +1498,10 @@ Usage:
                     "words": {},
                     "sentences": {}
                 }
+                self._rebuild_replacement_cache()
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Cleared all {total_count} replacements.")
-                logger.info(f"Admin {user_id} cleared all replacements.")
+                logger.info("Admin %s cleared all replacements.", user_id)
             
             elif replacement_type in ["links", "words", "sentences"]:
                 count = len(self.config.replacements[replacement_type])
@@ -983,14 +1510,15 @@ Usage:
                     return
                 
                 self.config.replacements[replacement_type] = {}
+                self._rebuild_replacement_cache()
                 self.save_config()
                 await self.send_message(chat_id, f"✅ Cleared {count} {replacement_type} replacements.")
-                logger.info(f"Admin {user_id} cleared {replacement_type} replacements.")
+                logger.info("Admin %s cleared %s replacements.", user_id, replacement_type)
             
             else:
                 await self.send_message(chat_id, "❌ Invalid type. Use: all, links, words, or sentences")
         except Exception as e:
-            logger.error(f"Error in cmd_clear_replacements: {e}", exc_info=True)
+            logger.error("Error in cmd_clear_replacements: %s", e, exc_info=True)
             await self.send_message(chat_id, "❌ An error occurred while clearing replacements.")
 
     async def handle_callback_query(self, callback_query):
@@ -999,6 +1527,7 @@ Usage:
         chat_id = str(callback_query["message"]["chat"]["id"])
         data = callback_query["data"]
         callback_query_id = callback_query["id"]
+        answered = False
         
         try:
             if not self.is_admin(user_id):
@@ -1006,155 +1535,121 @@ Usage:
                 return
             
             # Handle different callback data
-            if data == "list_admins":
-                admins = self.config.admin_users
-                admin_list = "\n".join([f"• <code>{admin_id}</code>" for admin_id in admins]) if admins else "No admins"
-                await self.send_message(chat_id, f"👥 <b>Admin Users:</b>\n{admin_list}")
-            
-            elif data == "list_channels":
-                channels = self.config.source_channels
-                channel_list = "\n".join([f"• <code>{ch}</code>" for ch in channels]) if channels else "No channels"
-                await self.send_message(chat_id, f"📢 <b>Source Channels:</b>\n{channel_list}")
-            
-            elif data == "view_replacements":
-                replacements = self.config.replacements
-                msg = "🔧 <b>All Replacements:</b>\n\n"
-                
-                if replacements["links"]:
-                    msg += "🔗 <b>Links:</b>\n"
-                    for old, new in replacements["links"].items():
-                        msg += f"• <code>{old}</code> → <code>{new}</code>\n"
-                    msg += "\n"
-                
-                if replacements["words"]:
-                    msg += "📝 <b>Words:</b>\n"
-                    for old, new in replacements["words"].items():
-                        msg += f"• <code>{old}</code> → <code>{new}</code>\n"
-                    msg += "\n"
-                
-                if replacements["sentences"]:
-                    msg += "📄 <b>Sentences:</b>\n"
-                    for old, new in replacements["sentences"].items():
-                        msg += f"• <code>{old}</code> → <code>{new}</code>\n"
-                
-                if not any(replacements.values()):
-                    msg += "No replacements configured."
-                
-                await self.send_message(chat_id, msg)
-
-            # Admin management help buttons
-            elif data == "add_admin_help":
-                await self.send_message(chat_id, "To add an admin, send: <code>/add_admin &lt;user_id&gt;</code>")
-            elif data == "remove_admin_help":
-                await self.send_message(chat_id, "To remove an admin, send: <code>/remove_admin &lt;user_id&gt;</code>")
-            
-            # Channel management help buttons
-            elif data == "add_channel_help":
-                await self.send_message(chat_id, "To add a channel, send: <code>/add_channel @channel_username</code> or <code>/add_channel -1001234567890</code>")
-            elif data == "remove_channel_help":
-                await self.send_message(chat_id, "To remove a channel, send: <code>/remove_channel @channel_username</code> or <code>/remove_channel -1001234567890</code>")
-
-            # Target management clear confirmation
-            elif data == "clear_target_confirm":
-                await self.cmd_clear_target(chat_id, user_id)
-            
-            # Replacement management buttons
-            elif data == "manage_links":
-                keyboard = {
-                    "inline_keyboard": [
-                        [{"text": "➕ Add Link", "callback_data": "add_link_help"}, 
-                         {"text": "➖ Remove Link", "callback_data": "remove_link_help"}],
-                        [{"text": "🗑️ Clear All Links", "callback_data": "clear_links"}],
-                        [{"text": "📋 List Links", "callback_data": "list_links"}]
-                    ]
-                }
-                await self.send_message(chat_id, "🔗 <b>Link Replacements Management</b>", keyboard)
-            
-            elif data == "manage_words":
-                keyboard = {
-                    "inline_keyboard": [
-                        [{"text": "➕ Add Word", "callback_data": "add_word_help"}, 
-                         {"text": "➖ Remove Word", "callback_data": "remove_word_help"}],
-                        [{"text": "🗑️ Clear All Words", "callback_data": "clear_words"}],
-                        [{"text": "📋 List Words", "callback_data": "list_words"}]
-                    ]
-                }
-                await self.send_message(chat_id, "📝 <b>Word Replacements Management</b>", keyboard)
+            handler = self._callbacks.get(data)
+            reply = None
+            if isinstance(handler, str): # Fixed help/usage text
+                reply = self.send_message(chat_id, handler)
+            elif handler is not None:
+                reply = handler(chat_id, user_id)
             
-            elif data == "manage_sentences":
-                keyboard = {
-                    "inline_keyboard": [
-                        [{"text": "➕ Add Sentence", "callback_data": "add_sentence_help"}, 
-                         {"text": "➖ Remove Sentence", "callback_data": "remove_sentence_help"}],
-                        [{"text": "🗑️ Clear All Sentences", "callback_data": "clear_sentences"}],
-                        [{"text": "📋 List Sentences", "callback_data": "list_sentences"}]
-                    ]
-                }
-                await self.send_message(chat_id, "📄 <b>Sentence Replacements Management</b>", keyboard)
-            
-            # Help callbacks for additions/removals
-            elif data == "add_link_help":
-                await self.send_message(chat_id, "Usage: <code>/add_link old_link|new_link</code>")
-            elif data == "remove_link_help":
-                await self.send_message(chat_id, "Usage: <code>/remove_link old_link</code>")
-            elif data == "add_word_help":
-                await self.send_message(chat_id, "Usage: <code>/add_word old_word|new_word</code>")
-            elif data == "remove_word_help":
-                await self.send_message(chat_id, "Usage: <code>/remove_word old_word</code>")
-            elif data == "add_sentence_help":
-                await self.send_message(chat_id, "Usage: <code>/add_sentence old_sentence|new_sentence</code>")
-            elif data == "remove_sentence_help":
-                await self.send_message(chat_id, "Usage: <code>/remove_sentence old_sentence</code>")
-            
-            # Clear specific types of replacements via callback
-            elif data == "clear_links":
-                await self.cmd_clear_replacements(chat_id, user_id, "/clear_replacements links")
-            elif data == "clear_words":
-                await self.cmd_clear_replacements(chat_id, user_id, "/clear_replacements words")
-            elif data == "clear_sentences":
-                await self.cmd_clear_replacements(chat_id, user_id, "/clear_replacements sentences")
-            elif data == "clear_all_replacements":
-                await self.cmd_clear_replacements(chat_id, user_id, "/clear_replacements all")
-            
-            # List specific types of replacements via callback
-            elif data == "list_links":
-                if self.config.replacements["links"]:
-                    msg = "<b>🔗 Link Replacements:</b>\n\n"
-                    for old, new in self.config.replacements["links"].items():
-                        msg += f"• <code>{old}</code> → <code>{new}</code>\n"
-                else:
-                    msg = "No link replacements configured."
-                await self.send_message(chat_id, msg)
-            
-            elif data == "list_words":
-                if self.config.replacements["words"]:
-                    msg = "<b>📝 Word Replacements:</b>\n\n"
-                    for old, new in self.config.replacements["words"].items():
-                        msg += f"• <code>{old}</code> → <code>{new}</code>\n"
-                else:
-                    msg = "No word replacements configured."
-                await self.send_message(chat_id, msg)
-            
-            elif data == "list_sentences":
-                if self.config.replacements["sentences"]:
-                    msg = "<b>📄 Sentence Replacements:</b>\n\n"
-                    for old, new in self.config.replacements["sentences"].items():
-                        msg += f"• <code>{old}</code> → <code>{new}</code>\n"
-                else:
-                    msg = "No sentence replacements configured."
-                await self.send_message(chat_id, msg)
-            
-            # Always answer the callback query to remove loading state
-            await self.answer_callback_query(callback_query_id)
+            # Always answer the callback query to remove loading state, concurrently with the reply
+            # instead of one round trip after it
+            answered = True
+            if reply is None:
+                await self.answer_callback_query(callback_query_id)
+            else:
+                _, result = await asyncio.gather(self.answer_callback_query(callback_query_id), reply, return_exceptions=True)
+                if isinstance(result, Exception):
+                    raise result
         except Exception as e:
-            logger.error(f"Error handling callback query '{data}': {e}", exc_info=True)
-            await self.answer_callback_query(callback_query_id, "❌ An error occurred.", show_alert=True)
+            logger.error("Error handling callback query '%s': %s", data, e, exc_info=True)
+            if not answered: # Telegram accepts only one answer per query
+                await self.answer_callback_query(callback_query_id, "❌ An error occurred.", show_alert=True)
             await self.send_message(chat_id, "❌ An internal error occurred while processing your request.")
 
+    async def _cb_list_admins(self, chat_id: str, user_id: int):
+        """List admins callback"""
+        msg = self._rendered_lists.get("admins")
+        if msg is None:
+            admins = self.config.admin_users
+            admin_list = "\n".join([f"• <code>{admin_id}</code>" for admin_id in admins]) if admins else "No admins"
+            msg = self._rendered_lists["admins"] = f"👥 <b>Admin Users:</b>\n{admin_list}"
+        await self.send_message(chat_id, msg)
+
+    async def _cb_list_channels(self, chat_id: str, user_id: int):
+        """List source channels callback"""
+        msg = self._rendered_lists.get("channels")
+        if msg is None:
+            channels = self.config.source_channels
+            channel_list = "\n".join([f"• <code>{ch}</code>" for ch in channels]) if channels else "No channels"
+            msg = self._rendered_lists["channels"] = f"📢 <b>Source Channels:</b>\n{channel_list}"
+        await self.send_message(chat_id, msg)
+
+    async def _cb_view_replacements(self, chat_id: str, user_id: int):
+        """View all replacements callback"""
+        msg = self._rendered_lists.get("view_replacements")
+        if msg is None:
+            msg = self._rendered_lists["view_replacements"] = self._render_all_replacements()
+        await self.send_message(chat_id, msg)
+
+    def _render_all_replacements(self) -> str:
+        """Build the "view all replacements" message"""
+        replacements = self.config.replacements
+        msg = "🔧 <b>All Replacements:</b>\n\n"
+        
+        if replacements["links"]:
+            msg += "🔗 <b>Links:</b>\n"
+            for old, new in replacements["links"].items():
+                msg += f"• <code>{old}</code> → <code>{new}</code>\n"
+            msg += "\n"
+        
+        if replacements["words"]:
+            msg += "📝 <b>Words:</b>\n"
+            for old, new in replacements["words"].items():
+                msg += f"• <code>{old}</code> → <code>{new}</code>\n"
+            msg += "\n"
+        
+        if replacements["sentences"]:
+            msg += "📄 <b>Sentences:</b>\n"
+            for old, new in replacements["sentences"].items():
+                msg += f"• <code>{old}</code> → <code>{new}</code>\n"
+        
+        if not any(replacements.values()):
+            msg += "No replacements configured."
+        
+        return msg
+
+    async def _cb_manage_links(self, chat_id: str, user_id: int):
+        """Link replacements menu callback"""
+        await self.send_message(chat_id, "🔗 <b>Link Replacements Management</b>", self._KB_MANAGE_LINKS)
+
+    async def _cb_manage_words(self, chat_id: str, user_id: int):
+        """Word replacements menu callback"""
+        await self.send_message(chat_id, "📝 <b>Word Replacements Management</b>", self._KB_MANAGE_WORDS)
+
+    async def _cb_manage_sentences(self, chat_id: str, user_id: int):
+        """Sentence replacements menu callback"""
+        await self.send_message(chat_id, "📄 <b>Sentence Replacements Management</b>", self._KB_MANAGE_SENTENCES)
+
+    async def _cb_list_replacements(self, replacement_type: str, chat_id: str, user_id: int):
+        """List one type of replacements (links/words/sentences) callback"""
+        msg = self._rendered_lists.get(replacement_type)
+        if msg is None:
+            title, icon = {
+                "links": ("Link", "🔗"),
+                "words": ("Word", "📝"),
+                "sentences": ("Sentence", "📄"),
+            }[replacement_type]
+            if self.config.replacements[replacement_type]:
+                msg = f"<b>{icon} {title} Replacements:</b>\n\n"
+                for old, new in self.config.replacements[replacement_type].items():
+                    msg += f"• <code>{old}</code> → <code>{new}</code>\n"
+            else:
+                msg = f"No {title.lower()} replacements configured."
+            self._rendered_lists[replacement_type] = msg
+        await self.send_message(chat_id, msg)
+
     async def get_webhook_info(self):
         """Get current webhook information from Telegram."""
         url = f"{self.base_url}/getWebhookInfo"
-        return await self._send_api_request("getWebhookInfo", {})
+        return await self._send_api_request("getWebhookInfo", {}, need_result=True)
+
+    def _webhook_max_connections(self) -> int:
+        """Configured max_connections, clamped to 1-100 unless a self-hosted Bot API server is used."""
+        max_connections = max(self.config.max_connections, 1)
+        if self.config.api_base_url.rstrip('/') == TELEGRAM_API_URL:
+            max_connections = min(max_connections, 100)
+        return max_connections
 
     async def set_webhook(self, cert_path: Optional[str] = None):
         """
@@ -1167,42 +1662,40 @@ Usage:
             return
 
         webhook_full_url = f"{self.config.webhook_url}/webhook"
-        logger.info(f"Attempting to set webhook to: {webhook_full_url}")
+        logger.info("Attempting to set webhook to: %s", webhook_full_url)
 
         payload = {
             "url": webhook_full_url,
-            "max_connections": 40, # Limit concurrent updates
-            "drop_pending_updates": True # Drop updates while bot was offline/reconfiguring
+            "max_connections": self._webhook_max_connections(),
+            "allowed_updates": WEBHOOK_ALLOWED_UPDATES,
+            "drop_pending_updates": self.config.drop_pending_updates # Whether to discard updates queued while offline
         }
 
         # If a certificate path is provided, send the certificate file
-        if cert_path and os.path.exists(cert_path):
+        if cert_path and await asyncio.to_thread(os.path.exists, cert_path):
             try:
                 with open(cert_path, 'rb') as cert_file:
-                    files = {'certificate': cert_file}
-                    # For sending files, aiohttp.FormData is typically used or raw multi-part form data
-                    # Let's switch to requests for simplicity of file upload in this specific case,
-                    # or restructure to use aiohttp.FormData
-                    # Sticking to aiohttp.ClientSession for consistency, creating FormData
+                    # Multipart upload via aiohttp.FormData; the open file is streamed, not read into memory first
                     data = aiohttp.FormData()
                     data.add_field('url', webhook_full_url)
                     data.add_field('max_connections', str(payload['max_connections']))
-                    data.add_field('drop_pending_updates', 'true')
-                    data.add_field('certificate', cert_file.read(), filename=os.path.basename(cert_path), content_type='application/x-pem-file')
-
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(f"{self.base_url}/setWebhook", data=data) as response:
-                            result = await response.json()
-                            if result.get("ok"):
-                                logger.info(f"Webhook set successfully to {webhook_full_url} with certificate.")
-                            else:
-                                logger.error(f"Failed to set webhook with certificate: {result.get('description')}")
-                            return result
+                    data.add_field('allowed_updates', orjson.dumps(WEBHOOK_ALLOWED_UPDATES).decode())
+                    data.add_field('drop_pending_updates', 'true' if payload['drop_pending_updates'] else 'false')
+                    data.add_field('certificate', cert_file, filename=os.path.basename(cert_path), content_type='application/x-pem-file')
+
+                    session = await self._get_session()
+                    async with session.post(f"{self.base_url}/setWebhook", data=data) as response:
+                        result = await response.json(loads=orjson.loads)
+                        if result.get("ok"):
+                            logger.info("Webhook set successfully to %s with certificate.", webhook_full_url)
+                        else:
+                            logger.error("Failed to set webhook with certificate: %s", result.get('description'))
+                        return result
             except FileNotFoundError:
-                logger.error(f"Certificate file not found at: {cert_path}")
+                logger.error("Certificate file not found at: %s", cert_path)
                 return {"ok": False, "description": "Certificate file not found."}
             except Exception as e:
-                logger.error(f"Error setting webhook with certificate: {e}", exc_info=True)
+                logger.error("Error setting webhook with certificate: %s", e, exc_info=True)
                 return {"ok": False, "description": f"Error with certificate: {e}"}
         else:
             # If no cert_path or file not found, proceed without certificate
@@ -1212,20 +1705,27 @@ Usage:
     async def delete_webhook(self):
         """Delete webhook URL for the bot."""
         logger.info("Attempting to delete webhook.")
-        result = await self._send_api_request("deleteWebhook", {"drop_pending_updates": True})
+        result = await self._send_api_request("deleteWebhook", {"drop_pending_updates": self.config.drop_pending_updates})
         if result.get("ok"):
             logger.info("Webhook deleted successfully.")
         else:
-            logger.error(f"Failed to delete webhook: {result.get('description')}")
+            logger.error("Failed to delete webhook: %s", result.get('description'))
         return result
 
     async def on_startup(self, app):
         """Actions to perform on bot startup."""
+        if self._started:
+            return # Already started; don't set the webhook twice
+        self._started = True
+        self._draining = False
         logger.info("Bot starting up...")
         # Initial admin setup if needed
         if not self.config.admin_users:
             logger.warning("No admin users configured. Please set one using the bot's /start command.")
         
+        if self._config_writer_task is None:
+            self._config_writer_task = asyncio.create_task(self._config_writer())
+        
         # Set webhook on startup
         # You would pass your actual certificate path here if you have one.
         # Example: await self.set_webhook(cert_path="/etc/letsencrypt/live/your_domain/fullchain.pem")
@@ -1233,42 +1733,68 @@ Usage:
 
     async def on_shutdown(self, app):
         """Actions to perform on bot shutdown."""
+        if not self._started:
+            return
+        self._started = False
         logger.info("Bot shutting down...")
-        await self.delete_webhook() # Delete webhook on shutdown to prevent missed updates
-        self.save_config() # Ensure config is saved one last time
+        if self.config.delete_webhook_on_shutdown:
+            await self.delete_webhook() # Stop deliveries; pending updates are kept unless drop_pending_updates is set
+        await self._drain_background_tasks() # Finish updates that were already acknowledged
+        await self._stop_config_writer() # Ensure config is saved one last time
+        await self._close_session() # Release pooled connections to the Telegram API
         logger.info("Bot shutdown complete.")
 
-    async def start_webhook(self, cert_file: Optional[str] = None, key_file: Optional[str] = None):
+    async def on_cleanup(self, app):
+        """Final cleanup once the web app has stopped serving."""
+        await self._close_session() # No-op if on_shutdown already closed it
+
+    async def start_webhook(self, cert_file: Optional[str] = None, key_file: Optional[str] = None) -> Optional[ssl.SSLContext]:
         """
         Starts the aiohttp web server to listen for webhooks.
         :param cert_file: Path to the SSL certificate file for the server (e.g., fullchain.pem).
         :param key_file: Path to the SSL private key file for the server (e.g., privkey.pem).
+        :return: The SSL context the server runs with, or None for plain HTTP.
         """
-        self.app.on_startup.append(self.on_startup)
-        self.app.on_shutdown.append(self.on_shutdown)
-
         ssl_context = None
-        if self.config.webhook_url.startswith("https://"):
-            if cert_file and key_file and os.path.exists(cert_file) and os.path.exists(key_file):
-                try:
-                    ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
-                    ssl_context.load_cert_chain(cert_file, key_file)
-                    logger.info(f"SSL context loaded from {cert_file} and {key_file}. Server will run on HTTPS.")
-                except Exception as e:
-                    logger.error(f"Error loading SSL certificates: {e}. Falling back to HTTP.", exc_info=True)
-                    ssl_context = None
-            else:
-                logger.warning("Webhook URL is HTTPS but no valid cert/key files provided for aiohttp server. Server will run on HTTP.")
+        # TLS state is only built when this server terminates HTTPS itself: an HTTPS webhook URL,
+        # no UNIX socket (the reverse proxy in front of it handles TLS), and both cert files given
+        serve_https = self.config.webhook_url.startswith("https://") and not self.config.unix_socket_path
+        if serve_https and cert_file and key_file:
+            try:
+                # Cert parsing reads from disk, keep it off the event loop. Missing files surface
+                # as FileNotFoundError from the load itself, so there's no separate exists() check
+                ssl_context = await asyncio.to_thread(_build_ssl_context, cert_file, key_file)
+                logger.info("SSL context loaded from %s and %s. Server will run on HTTPS.", cert_file, key_file)
+            except FileNotFoundError:
+                logger.warning("Webhook URL is HTTPS but the cert/key files were not found. Server will run on HTTP.")
+            except Exception as e:
+                logger.error("Error loading SSL certificates: %s. Falling back to HTTP.", e, exc_info=True)
+                ssl_context = None
+        elif serve_https:
+            logger.warning("Webhook URL is HTTPS but no valid cert/key files provided for aiohttp server. Server will run on HTTP.")
         
-        if ssl_context:
-            logger.info(f"Starting Aiohttp HTTPS server on port {self.config.webhook_port}...")
+        # setup() runs the on_startup hooks, cleanup() in stop_webhook runs on_shutdown/on_cleanup
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        if self.config.unix_socket_path:
+            logger.info("Starting Aiohttp HTTP server on UNIX socket %s...", self.config.unix_socket_path)
+            site = web.UnixSite(self._runner, self.config.unix_socket_path)
         else:
-            logger.info(f"Starting Aiohttp HTTP server on port {self.config.webhook_port}...")
-        
-        # Running the app needs to be done in your main execution script
-        # For testing, you can use: web.run_app(self.app, port=self.config.webhook_port, ssl_context=ssl_context)
-        # For production, consider gunicorn or similar WSGI servers with aiohttp workers.
-        # This method just prepares the app and hooks.
+            if ssl_context:
+                logger.info("Starting Aiohttp HTTPS server on port %s...", self.config.webhook_port)
+            else:
+                logger.info("Starting Aiohttp HTTP server on port %s...", self.config.webhook_port)
+            site = web.TCPSite(self._runner, '0.0.0.0', self.config.webhook_port,
+                               ssl_context=ssl_context, backlog=SERVER_BACKLOG,
+                               reuse_port=self.config.reuse_port or None)
+        await site.start()
+        return ssl_context
+
+    async def stop_webhook(self):
+        """Stop the web server started by start_webhook and run the shutdown hooks."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
 
 # Example usage in a main script (e.g., main.py)
 async def main():
@@ -1299,19 +1825,25 @@ async def main():
     cert_file = None
     key_file = None
 
-    # This will set up the webhook on Telegram and start the aiohttp server
-    # for production, you'd typically run this with a WSGI server like gunicorn
-    # For development/testing:
+    # Run until SIGINT/SIGTERM; the app's startup/shutdown hooks run exactly once through the runner
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass # Windows: Ctrl+C still arrives as KeyboardInterrupt
+
     try:
-        await bot.on_startup(bot.app) # Manually call startup hook for simple run_app
-        web.run_app(bot.app, host='0.0.0.0', port=bot.config.webhook_port, ssl_context=None) # No ssl_context needed if reverse proxy handles SSL
-                                                                                               # If aiohttp serves HTTPS, pass ssl_context here
+        await bot.start_webhook(cert_file, key_file) # Sets the webhook on Telegram and starts serving
+        await stop_event.wait()
+        logger.info("Stop signal received, initiating shutdown.")
     except asyncio.CancelledError:
         logger.info("Application cancelled, initiating shutdown.")
     except Exception as e:
-        logger.critical(f"Unhandled error during bot startup/runtime: {e}", exc_info=True)
+        logger.critical("Unhandled error during bot startup/runtime: %s", e, exc_info=True)
     finally:
-        await bot.on_shutdown(bot.app) # Manually call shutdown hook
+        await bot.stop_webhook() # Runs the on_shutdown/on_cleanup hooks
 
 
 if __name__ == "__main__":
@@ -1328,8 +1860,10 @@ if __name__ == "__main__":
     # os.environ["WEBHOOK_PORT"] = "8443"
 
     try:
-        asyncio.run(main())
+        # Run on uvloop when it's installed, the default asyncio loop otherwise
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+            runner.run(main())
     except KeyboardInterrupt:
         logger.info("Bot stopped by user (Ctrl+C).")
     except Exception as e:
-        logger.critical(f"Application terminated due to unhandled exception: {e}", exc_info=True)
+        logger.critical("Application terminated due to unhandled exception: %s", e, exc_info=True)